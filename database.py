@@ -1,14 +1,36 @@
 import sqlite3
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
 import os
 import json
 from pathlib import Path
-import shutil
+import queue
 import threading
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 
+# orjson is noticeably faster than the stdlib encoder and runs on the
+# write-transaction critical path in save_result; fall back to json if the
+# package is not installed.
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _json_dump_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _json_dump_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+# INSERT ... RETURNING needs SQLite >= 3.35; fall back to lastrowid otherwise.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,23 +42,273 @@ logging.basicConfig(
 )
 
 class Database:
+    # Hot SQL statements reused on every request. Keeping them as class-level
+    # constants means each connection's statement cache (sized via
+    # cached_statements below) gets a hit instead of re-parsing the SQL text.
+    # UPSERT rather than INSERT OR REPLACE: REPLACE deletes and re-inserts
+    # the row, which breaks foreign-key references from bet_accounts and
+    # rewrites every index; DO UPDATE modifies the row in place.
+    _SQL_SAVE_ACCOUNT = """
+        INSERT INTO accounts (account_id, name, balance, remarks)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(account_id) DO UPDATE SET
+            name = excluded.name,
+            balance = excluded.balance,
+            remarks = excluded.remarks,
+            updated_at = CURRENT_TIMESTAMP
+    """
+    _SQL_INSERT_MATCH = """
+        INSERT INTO matches (team1, team2, match_date, match_time)
+        VALUES (?, ?, ?, ?)
+    """
+    _SQL_INSERT_BET = """
+        INSERT INTO bets (match_id, team1_odds, team2_odds, betting_value)
+        VALUES (?, ?, ?, ?)
+    """
+    _SQL_INSERT_MATCH_RETURNING = _SQL_INSERT_MATCH + " RETURNING match_id"
+    _SQL_INSERT_BET_RETURNING = _SQL_INSERT_BET + " RETURNING bet_id"
+    _SQL_INSERT_BET_ACCOUNT = """
+        INSERT INTO bet_accounts (bet_id, account_id, team_number, bet_amount)
+        VALUES (?, ?, ?, ?)
+    """
+    _SQL_BET_ACCOUNTS = """
+        SELECT
+            ba.team_number,
+            ba.bet_amount,
+            a.account_id,
+            a.name,
+            a.balance
+        FROM bet_accounts ba
+        JOIN accounts a ON ba.account_id = a.account_id
+        WHERE ba.bet_id = ?
+        ORDER BY ba.team_number, a.account_id
+    """
+    _SQL_ACTIVE_BETS = """
+        SELECT
+            b.bet_id,
+            m.team1,
+            m.team2,
+            m.match_date,
+            m.match_time,
+            b.team1_odds,
+            b.team2_odds,
+            b.betting_value,
+            CAST(b.betting_value AS REAL) / b.team1_odds AS bet_display1,
+            CAST(b.betting_value AS REAL) / b.team2_odds AS bet_display2,
+            b.created_at
+        FROM bets b
+        JOIN matches m ON b.match_id = m.match_id
+        WHERE b.status = 'active'
+        ORDER BY m.match_date, m.match_time
+    """
+    _SQL_BET_DETAILS = """
+        SELECT
+            b.*,
+            m.team1,
+            m.team2,
+            m.match_date,
+            m.match_time
+        FROM bets b
+        JOIN matches m ON b.match_id = m.match_id
+        WHERE b.bet_id = ?
+    """
+    # The status guard makes result application idempotent: a second
+    # attempt on a completed bet matches zero rows and is rejected.
+    _SQL_COMPLETE_BET = """
+        UPDATE bets
+        SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+        WHERE bet_id = ? AND status = 'active'
+    """
+    _SQL_INSERT_RESULT = """
+        INSERT INTO results (
+            bet_id, winning_team, result_type,
+            profit_amount, loss_amount, cashout_details
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    _SQL_INSERT_RESULT_RETURNING = _SQL_INSERT_RESULT + " RETURNING result_id"
+    _SQL_INSERT_CASHOUT_ENTRY = """
+        INSERT INTO cashout_entries (result_id, account_id, amount)
+        VALUES (?, ?, ?)
+    """
+    _SQL_CREDIT_ACCOUNT = """
+        UPDATE accounts
+        SET balance = balance + ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE account_id = ?
+    """
+    # Mirror statements for the in-memory copies of the read-mostly tables
+    # (see _refresh_memory_mirror). Kept in lockstep with the main-db writes.
+    _SQL_SAVE_ACCOUNT_MEM = """
+        INSERT INTO mem.accounts (account_id, name, balance, remarks)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(account_id) DO UPDATE SET
+            name = excluded.name,
+            balance = excluded.balance,
+            remarks = excluded.remarks,
+            updated_at = CURRENT_TIMESTAMP
+    """
+    _SQL_CREDIT_ACCOUNT_MEM = """
+        UPDATE mem.accounts
+        SET balance = balance + ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE account_id = ?
+    """
+
+    # Number of pooled read-only connections. Under WAL these run
+    # concurrently with the single writer connection.
+    _READER_POOL_SIZE = 4
+
     def __init__(self, db_path: str = "data/betting.db"):
         """Initialize database with proper error handling and logging."""
         self.db_path = db_path
-        self._local = threading.local()
+        self._write_lock = threading.Lock()
         self._setup_database()
+        self._open_connections()
         logging.info(f"Database initialized at {db_path}")
 
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection, read_only: bool = False) -> None:
+        """Apply per-connection PRAGMA tuning (WAL, sync level, caches)."""
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute("PRAGMA busy_timeout = 5000")
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode.lower() != 'wal':
+                logging.warning(f"WAL mode not available, using journal_mode={journal_mode}")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+            cursor.execute("PRAGMA wal_autocheckpoint = 1000")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA cache_size = -65536")
+        cursor.execute("PRAGMA mmap_size = 268435456")
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a tuned connection, optionally in read-only mode."""
+        if read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   check_same_thread=False, cached_statements=256)
+        else:
+            # BEGIN IMMEDIATE takes the write lock up front instead of
+            # upgrading mid-transaction, so contention surfaces immediately
+            # (and waits on busy_timeout) rather than wasting completed work.
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   cached_statements=256,
+                                   isolation_level="IMMEDIATE")
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn, read_only=read_only)
+        return conn
+
+    def _warm_reader(self, conn: sqlite3.Connection) -> None:
+        """Prime a pooled reader's statement cache with its hot queries.
+
+        Python's sqlite3 has no SQLITE_PREPARE_PERSISTENT flag, but the
+        pooled readers live for the process lifetime and the statement
+        cache matches on exact SQL text, so executing the constants the
+        read methods actually run (with throwaway parameters) gives the
+        same effect. Accounts and settings are not warmed: those reads
+        are served from the writer's in-memory mirrors.
+        """
+        for sql, params in (
+            (self._SQL_ACTIVE_BETS, ()),
+            (self._SQL_BET_DETAILS, (0,)),
+            (self._SQL_BET_ACCOUNTS, (0,)),
+            (self._SQL_BET_HISTORY_FLAT, self._history_params(None, 0)),
+        ):
+            conn.execute(sql, params)
+
+    def _open_connections(self) -> None:
+        """Open the persistent writer connection and the reader pool."""
+        self._writer = self._connect()
+        self._writer.execute("ATTACH DATABASE ':memory:' AS mem")
+        self._refresh_memory_mirror()
+        self._readers = queue.Queue()
+        for _ in range(self._READER_POOL_SIZE):
+            conn = self._connect(read_only=True)
+            self._warm_reader(conn)
+            self._readers.put(conn)
+
+    def _close_connections(self) -> None:
+        """Close the writer connection and drain the reader pool."""
+        if getattr(self, '_writer', None) is not None:
+            self._writer.close()
+            self._writer = None
+        while getattr(self, '_readers', None) is not None and not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    @contextmanager
+    def _write(self):
+        """Check out the single writer connection (serialized by a lock)."""
+        with self._write_lock:
+            yield self._writer, self._writer.cursor()
+
+    def _refresh_memory_mirror(self) -> None:
+        """Rebuild the in-memory copies of accounts and settings.
+
+        Both tables are tiny, written rarely, and read on almost every page
+        render; serving those reads from the attached :memory: database
+        avoids touching the main database file entirely.
+        """
+        cursor = self._writer.cursor()
+        cursor.execute("DROP TABLE IF EXISTS mem.accounts")
+        cursor.execute("""
+            CREATE TABLE mem.accounts (
+                account_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                balance DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+                remarks TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                is_active BOOLEAN DEFAULT 1
+            )
+        """)
+        cursor.execute("INSERT INTO mem.accounts SELECT * FROM main.accounts")
+        cursor.execute("DROP TABLE IF EXISTS mem.settings")
+        cursor.execute("CREATE TABLE mem.settings AS SELECT * FROM main.settings")
+        self._writer.commit()
+
+    @staticmethod
+    def _read_frame(conn: sqlite3.Connection, sql: str,
+                    params: tuple = ()) -> pd.DataFrame:
+        """Run a query and build a DataFrame straight from the cursor.
+
+        Bypasses pandas' read_sql adapter, which re-infers column types and
+        converts row by row; from_records over fetchall is ~2x faster here.
+        """
+        cursor = conn.execute(sql, params)
+        return pd.DataFrame.from_records(
+            cursor.fetchall(),
+            columns=[c[0] for c in cursor.description]
+        )
+
+    @contextmanager
+    def _read(self):
+        """Check a read-only connection out of the pool for one call."""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     def _setup_database(self) -> None:
         """Set up database directory and initial connection."""
         try:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   cached_statements=256)
             conn.row_factory = sqlite3.Row
+            # Must run before anything (including the WAL switch) initializes
+            # the file: only takes effect on freshly created databases. Lets
+            # close() reclaim free pages with incremental_vacuum instead of a
+            # full VACUUM lock.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._apply_pragmas(conn)
             cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
             # Only CREATE TABLE IF NOT EXISTS, do NOT drop tables!
-            cursor.executescript('''
+            # executescript would commit after every statement; run the whole
+            # schema plus the settings seed as one transaction (one fsync).
+            schema = '''
                 -- Accounts table
                 CREATE TABLE IF NOT EXISTS accounts (
                     account_id INTEGER PRIMARY KEY,
@@ -99,6 +371,18 @@ class Database:
                     FOREIGN KEY (bet_id) REFERENCES bets(bet_id) ON DELETE CASCADE
                 );
 
+                -- Cashout entries table (structured form of
+                -- results.cashout_details, queryable/aggregatable in SQL)
+                CREATE TABLE IF NOT EXISTS cashout_entries (
+                    result_id INTEGER NOT NULL,
+                    account_id INTEGER NOT NULL,
+                    amount DECIMAL(10,2) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (result_id, account_id),
+                    FOREIGN KEY (result_id) REFERENCES results(result_id) ON DELETE CASCADE,
+                    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+                );
+
                 -- Settings table
                 CREATE TABLE IF NOT EXISTS settings (
                     setting_id INTEGER PRIMARY KEY CHECK (setting_id = 1),
@@ -113,11 +397,21 @@ class Database:
                 CREATE INDEX IF NOT EXISTS idx_bet_accounts_bet ON bet_accounts(bet_id);
                 CREATE INDEX IF NOT EXISTS idx_bet_accounts_account ON bet_accounts(account_id);
                 CREATE INDEX IF NOT EXISTS idx_results_bet ON results(bet_id);
-            ''')
+                -- Composite indexes covering the active/history queries:
+                -- status filter + match join on bets, and the
+                -- (match_date, match_time) sort on matches.
+                CREATE INDEX IF NOT EXISTS idx_bets_status_match ON bets(status, match_id);
+                CREATE INDEX IF NOT EXISTS idx_matches_date_time ON matches(match_date, match_time);
+            '''
+            cursor.execute("BEGIN")
+            for statement in schema.split(';'):
+                if statement.strip():
+                    cursor.execute(statement)
             cursor.execute("""
                 INSERT OR IGNORE INTO settings (setting_id, min_transfer, default_betting_value)
                 VALUES (1, 250.00, 2100.00)
             """)
+            cursor.execute("ANALYZE")
             conn.commit()
             conn.close()
             logging.info("Database tables and indexes created successfully")
@@ -125,142 +419,125 @@ class Database:
             logging.error(f"Error setting up database: {str(e)}")
             raise
 
-    def _get_connection(self) -> tuple:
-        """Get a thread-local database connection with proper error handling."""
-        try:
-            if not hasattr(self._local, 'conn'):
-                self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                self._local.conn.row_factory = sqlite3.Row
-                self._local.cursor = self._local.conn.cursor()
-                self._local.cursor.execute("PRAGMA foreign_keys = ON")
-            return self._local.conn, self._local.cursor
-        except Exception as e:
-            logging.error(f"Error getting database connection: {str(e)}")
-            raise
+    @classmethod
+    def _insert_with_id(cls, cursor: sqlite3.Cursor, sql: str,
+                        sql_returning: str, params: tuple) -> int:
+        """Insert a row and return its ID, via RETURNING when supported."""
+        if _HAS_RETURNING:
+            cursor.execute(sql_returning, params)
+            return cursor.fetchone()[0]
+        cursor.execute(sql, params)
+        return cursor.lastrowid
 
     def get_accounts(self) -> pd.DataFrame:
-        """Get all active accounts."""
+        """Get all active accounts (served from the in-memory mirror)."""
         try:
-            conn, _ = self._get_connection()
-            return pd.read_sql_query(
-                "SELECT * FROM accounts WHERE is_active = 1 ORDER BY account_id",
-                conn
-            )
+            with self._write() as (conn, _):
+                return self._read_frame(
+                    conn,
+                    "SELECT * FROM mem.accounts WHERE is_active = 1 ORDER BY account_id"
+                )
         except Exception as e:
             logging.error(f"Error getting accounts: {str(e)}")
             raise
 
     def save_account(self, account_data: Dict) -> None:
         """Save or update an account with proper validation."""
-        try:
-            conn, cursor = self._get_connection()
-            cursor.execute("""
-                INSERT OR REPLACE INTO accounts 
-                (account_id, name, balance, remarks, updated_at)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (
-                account_data['account_id'],
-                account_data.get('name', f'Account {account_data["account_id"]}'),
-                account_data['balance'],
-                account_data.get('remarks', '')
-            ))
-            conn.commit()
-            logging.info(f"Account {account_data['account_id']} saved successfully")
-        except Exception as e:
-            conn.rollback()
-            logging.error(f"Error saving account: {str(e)}")
-            raise
+        with self._write() as (conn, cursor):
+            try:
+                params = (
+                    account_data['account_id'],
+                    account_data.get('name', f'Account {account_data["account_id"]}'),
+                    account_data['balance'],
+                    account_data.get('remarks', '')
+                )
+                cursor.execute(self._SQL_SAVE_ACCOUNT, params)
+                cursor.execute(self._SQL_SAVE_ACCOUNT_MEM, params)
+                conn.commit()
+                logging.info(f"Account {account_data['account_id']} saved successfully")
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Error saving account: {str(e)}")
+                raise
+
+    def apply_balance_deltas(self, deltas: Dict[int, float]) -> None:
+        """Apply signed balance changes to several accounts in one transaction."""
+        if not deltas:
+            return
+        rows = [(delta, account_id) for account_id, delta in deltas.items()]
+        with self._write() as (conn, cursor):
+            try:
+                with conn:
+                    cursor.executemany(self._SQL_CREDIT_ACCOUNT, rows)
+                    cursor.executemany(self._SQL_CREDIT_ACCOUNT_MEM, rows)
+                logging.info(f"Applied balance deltas to {len(rows)} accounts")
+            except Exception as e:
+                logging.error(f"Error applying balance deltas: {str(e)}")
+                raise
 
     def create_match(self, match_data: Dict) -> int:
         """Create a new match and return its ID."""
-        try:
-            conn, cursor = self._get_connection()
-            cursor.execute("""
-                INSERT INTO matches (team1, team2, match_date, match_time)
-                VALUES (?, ?, ?, ?)
-            """, (
-                match_data['team1'],
-                match_data['team2'],
-                match_data['match_date'],
-                match_data['match_time']
-            ))
-            match_id = cursor.lastrowid
-            conn.commit()
-            logging.info(f"Match created with ID: {match_id}")
-            return match_id
-        except Exception as e:
-            conn.rollback()
-            logging.error(f"Error creating match: {str(e)}")
-            raise
+        with self._write() as (conn, cursor):
+            try:
+                match_id = self._insert_with_id(
+                    cursor, self._SQL_INSERT_MATCH,
+                    self._SQL_INSERT_MATCH_RETURNING, (
+                        match_data['team1'],
+                        match_data['team2'],
+                        match_data['match_date'],
+                        match_data['match_time']
+                    ))
+                conn.commit()
+                logging.info(f"Match created with ID: {match_id}")
+                return match_id
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Error creating match: {str(e)}")
+                raise
 
     def create_bet(self, bet_data: Dict) -> int:
         """Create a new bet with proper transaction handling."""
-        try:
-            conn, cursor = self._get_connection()
-            cursor.execute("BEGIN TRANSACTION")
-            match_id = bet_data.get('match_id')
-            if not match_id:
-                cursor.execute("""
-                    INSERT INTO matches (team1, team2, match_date, match_time)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    bet_data['team1'],
-                    bet_data['team2'],
-                    bet_data['match_date'],
-                    bet_data['match_time']
-                ))
-                match_id = cursor.lastrowid
-            cursor.execute("""
-                INSERT INTO bets (match_id, team1_odds, team2_odds, betting_value)
-                VALUES (?, ?, ?, ?)
-            """, (
-                match_id,
-                bet_data['team1_odds'],
-                bet_data['team2_odds'],
-                bet_data['betting_value']
-            ))
-            bet_id = cursor.lastrowid
-            for acc in bet_data['team1_accounts']:
-                cursor.execute("""
-                    INSERT INTO bet_accounts (bet_id, account_id, team_number, bet_amount)
-                    VALUES (?, ?, 1, ?)
-                """, (bet_id, acc, bet_data['bet_amount1']))
-            for acc in bet_data['team2_accounts']:
-                cursor.execute("""
-                    INSERT INTO bet_accounts (bet_id, account_id, team_number, bet_amount)
-                    VALUES (?, ?, 2, ?)
-                """, (bet_id, acc, bet_data['bet_amount2']))
-            conn.commit()
-            logging.info(f"Bet created with ID: {bet_id}")
-            return bet_id
-        except Exception as e:
+        with self._write() as (conn, cursor):
             try:
-                conn.rollback()
-            except Exception:
-                pass
-            logging.error(f"Error creating bet: {str(e)}")
-            raise
+                # The connection context manager opens the transaction and
+                # commits on success / rolls back on error.
+                with conn:
+                    match_id = bet_data.get('match_id')
+                    if not match_id:
+                        match_id = self._insert_with_id(
+                            cursor, self._SQL_INSERT_MATCH,
+                            self._SQL_INSERT_MATCH_RETURNING, (
+                                bet_data['team1'],
+                                bet_data['team2'],
+                                bet_data['match_date'],
+                                bet_data['match_time']
+                            ))
+                    bet_id = self._insert_with_id(
+                        cursor, self._SQL_INSERT_BET,
+                        self._SQL_INSERT_BET_RETURNING, (
+                            match_id,
+                            bet_data['team1_odds'],
+                            bet_data['team2_odds'],
+                            bet_data['betting_value']
+                        ))
+                    account_rows = (
+                        [(bet_id, acc, 1, bet_data['bet_amount1'])
+                         for acc in bet_data['team1_accounts']] +
+                        [(bet_id, acc, 2, bet_data['bet_amount2'])
+                         for acc in bet_data['team2_accounts']]
+                    )
+                    cursor.executemany(self._SQL_INSERT_BET_ACCOUNT, account_rows)
+                logging.info(f"Bet created with ID: {bet_id}")
+                return bet_id
+            except Exception as e:
+                logging.error(f"Error creating bet: {str(e)}")
+                raise
 
     def get_active_bets(self) -> pd.DataFrame:
         """Get all active bets with related information."""
         try:
-            conn, _ = self._get_connection()
-            return pd.read_sql_query("""
-                SELECT 
-                    b.bet_id,
-                    m.team1,
-                    m.team2,
-                    m.match_date,
-                    m.match_time,
-                    b.team1_odds,
-                    b.team2_odds,
-                    b.betting_value,
-                    b.created_at
-                FROM bets b
-                JOIN matches m ON b.match_id = m.match_id
-                WHERE b.status = 'active'
-                ORDER BY m.match_date, m.match_time
-            """, conn)
+            with self._read() as conn:
+                return self._read_frame(conn, self._SQL_ACTIVE_BETS)
         except Exception as e:
             logging.error(f"Error getting active bets: {str(e)}")
             raise
@@ -268,34 +545,17 @@ class Database:
     def get_bet_details(self, bet_id: int) -> Dict:
         """Get detailed information about a specific bet."""
         try:
-            conn, cursor = self._get_connection()
-            cursor.execute("""
-                SELECT 
-                    b.*,
-                    m.team1,
-                    m.team2,
-                    m.match_date,
-                    m.match_time
-                FROM bets b
-                JOIN matches m ON b.match_id = m.match_id
-                WHERE b.bet_id = ?
-            """, (bet_id,))
-            bet_info = cursor.fetchone()
-            if not bet_info:
-                raise ValueError(f"Bet {bet_id} not found")
-            cursor.execute("""
-                SELECT 
-                    ba.team_number,
-                    ba.bet_amount,
-                    a.account_id,
-                    a.name,
-                    a.balance
-                FROM bet_accounts ba
-                JOIN accounts a ON ba.account_id = a.account_id
-                WHERE ba.bet_id = ?
-                ORDER BY ba.team_number, a.account_id
-            """, (bet_id,))
-            accounts = [dict(row) for row in cursor.fetchall()]
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self._SQL_BET_DETAILS, (bet_id,))
+                bet_info = cursor.fetchone()
+                if not bet_info:
+                    raise ValueError(f"Bet {bet_id} not found")
+                cursor.execute(self._SQL_BET_ACCOUNTS, (bet_id,))
+                # Build the dicts from cursor.description once instead of a
+                # per-row dict(sqlite3.Row) conversion with name lookups.
+                cols = [c[0] for c in cursor.description]
+                accounts = [dict(zip(cols, row)) for row in cursor.fetchall()]
             return {
                 'bet_id': bet_id,
                 'team1': bet_info['team1'],
@@ -313,54 +573,63 @@ class Database:
 
     def save_result(self, result_data: Dict) -> None:
         """Save bet result with proper transaction handling."""
-        try:
-            conn, cursor = self._get_connection()
-            cursor.execute("BEGIN TRANSACTION")
-            cursor.execute("""
-                UPDATE bets 
-                SET status = 'completed', updated_at = CURRENT_TIMESTAMP
-                WHERE bet_id = ?
-            """, (result_data['bet_id'],))
-            cursor.execute("""
-                INSERT INTO results (
-                    bet_id, winning_team, result_type,
-                    profit_amount, loss_amount, cashout_details
-                )
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                result_data['bet_id'],
-                result_data.get('winning_team'),  # allow None
-                result_data['result_type'],
-                result_data.get('profit_amount'),
-                result_data.get('loss_amount'),
-                json.dumps(result_data.get('cashout_details', []))
-            ))
-            if result_data['result_type'] == 'win':
-                for acc in result_data['winning_accounts']:
-                    cursor.execute("""
-                        UPDATE accounts 
-                        SET balance = balance + ?,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE account_id = ?
-                    """, (acc['profit'], acc['account_id']))
-            conn.commit()
-            logging.info(f"Result saved for bet {result_data['bet_id']}")
-        except Exception as e:
+        with self._write() as (conn, cursor):
             try:
-                conn.rollback()
-            except Exception:
-                pass
-            logging.error(f"Error saving result: {str(e)}")
-            raise
+                # The connection context manager opens the transaction and
+                # commits on success / rolls back on error.
+                with conn:
+                    cursor.execute(self._SQL_COMPLETE_BET, (result_data['bet_id'],))
+                    if cursor.rowcount == 0:
+                        raise ValueError(
+                            f"Bet {result_data['bet_id']} is not active; "
+                            "result already applied?"
+                        )
+                    cashout_details = result_data.get('cashout_details', [])
+                    # The JSON column is kept for one release while readers
+                    # migrate to the cashout_entries table.
+                    result_id = self._insert_with_id(
+                        cursor, self._SQL_INSERT_RESULT,
+                        self._SQL_INSERT_RESULT_RETURNING, (
+                            result_data['bet_id'],
+                            result_data.get('winning_team'),  # allow None
+                            result_data['result_type'],
+                            result_data.get('profit_amount'),
+                            result_data.get('loss_amount'),
+                            _json_dumps(cashout_details)
+                        ))
+                    if cashout_details:
+                        cursor.executemany(
+                            self._SQL_INSERT_CASHOUT_ENTRY,
+                            [(result_id, entry['account_id'], entry['amount'])
+                             for entry in cashout_details])
+                    # Credit balances in the same transaction so closing a
+                    # bet is a single atomic write, not one commit per account.
+                    credits = []
+                    if result_data['result_type'] == 'win':
+                        credits = [(acc['profit'], acc['account_id'])
+                                   for acc in result_data['winning_accounts']]
+                    elif result_data['result_type'] == 'cashout':
+                        credits = [(entry['amount'], entry['account_id'])
+                                   for entry in cashout_details]
+                    if credits:
+                        cursor.executemany(self._SQL_CREDIT_ACCOUNT, credits)
+                        cursor.executemany(self._SQL_CREDIT_ACCOUNT_MEM, credits)
+                logging.info(f"Result saved for bet {result_data['bet_id']}")
+            except Exception as e:
+                logging.error(f"Error saving result: {str(e)}")
+                raise
 
     def get_settings(self) -> Dict:
         """Get application settings."""
         try:
-            conn, _ = self._get_connection()
-            return pd.read_sql_query(
-                "SELECT * FROM settings WHERE setting_id = 1",
-                conn
-            ).iloc[0].to_dict()
+            with self._write() as (conn, _):
+                row = conn.execute(
+                    "SELECT min_transfer, default_betting_value FROM mem.settings WHERE setting_id = 1"
+                ).fetchone()
+            return {
+                'min_transfer': row['min_transfer'],
+                'default_betting_value': row['default_betting_value']
+            }
         except Exception as e:
             logging.error(f"Error getting settings: {str(e)}")
             return {
@@ -370,24 +639,26 @@ class Database:
 
     def save_settings(self, settings: Dict) -> None:
         """Save application settings."""
-        try:
-            conn, cursor = self._get_connection()
-            cursor.execute("""
-                UPDATE settings 
-                SET min_transfer = ?,
-                    default_betting_value = ?,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE setting_id = 1
-            """, (
-                settings['min_transfer'],
-                settings['default_betting_value']
-            ))
-            conn.commit()
-            logging.info("Settings updated successfully")
-        except Exception as e:
-            conn.rollback()
-            logging.error(f"Error saving settings: {str(e)}")
-            raise
+        with self._write() as (conn, cursor):
+            try:
+                params = (
+                    settings['min_transfer'],
+                    settings['default_betting_value']
+                )
+                for table in ('settings', 'mem.settings'):
+                    cursor.execute(f"""
+                        UPDATE {table}
+                        SET min_transfer = ?,
+                            default_betting_value = ?,
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE setting_id = 1
+                    """, params)
+                conn.commit()
+                logging.info("Settings updated successfully")
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Error saving settings: {str(e)}")
+                raise
 
     def backup_database(self) -> str:
         """Create a backup of the database."""
@@ -397,9 +668,29 @@ class Database:
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = os.path.join(backup_dir, f"backup_{timestamp}.db")
-            
-            # Create backup
-            shutil.copy2(self.db_path, backup_path)
+
+            # Use SQLite's online backup API: consistent even with active
+            # writers, and free pages are skipped. Checkpoint first so the
+            # backup is a single self-contained file without a WAL sidecar.
+            with self._write() as (src, cursor):
+                cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                dst = sqlite3.connect(backup_path)
+                try:
+                    src.backup(dst, pages=1024)
+                finally:
+                    dst.close()
+                # Human-readable snapshot next to the .db: the in-memory
+                # mirrors are consistent with the state just backed up.
+                snapshot = {
+                    'created_at': timestamp,
+                    'accounts': [dict(row) for row in
+                                 cursor.execute("SELECT * FROM mem.accounts")],
+                    'settings': [dict(row) for row in
+                                 cursor.execute("SELECT * FROM mem.settings")]
+                }
+            snapshot_path = Path(backup_path).with_suffix('.json')
+            # Encode in memory and write once instead of streaming
+            snapshot_path.write_bytes(_json_dump_bytes(snapshot))
             logging.info(f"Database backup created at {backup_path}")
             return backup_path
         except Exception as e:
@@ -409,18 +700,17 @@ class Database:
     def reset_database(self) -> bool:
         """Reset database to initial state."""
         try:
-            # Close any existing connections
-            if hasattr(self._local, 'conn'):
-                self._local.conn.close()
-                del self._local.conn
-                del self._local.cursor
-
-            # Delete the database file
-            if os.path.exists(self.db_path):
-                os.remove(self.db_path)
-
-            # Recreate database
-            self._setup_database()
+            with self._write_lock:
+                # Close any existing connections
+                self._close_connections()
+
+                # Delete the database file
+                if os.path.exists(self.db_path):
+                    os.remove(self.db_path)
+
+                # Recreate database
+                self._setup_database()
+                self._open_connections()
             logging.info("Database reset successfully")
             return True
         except Exception as e:
@@ -430,61 +720,145 @@ class Database:
     def close(self) -> None:
         """Close all database connections."""
         try:
-            if hasattr(self._local, 'conn'):
-                self._local.conn.close()
-                del self._local.conn
-                del self._local.cursor
+            with self._write_lock:
+                if getattr(self, '_writer', None) is not None:
+                    # Let SQLite fold the session's gathered statistics into
+                    # its planner stats and reclaim a bounded number of free
+                    # pages before shutting down.
+                    self._writer.execute("PRAGMA optimize")
+                    self._writer.execute("PRAGMA incremental_vacuum(1000)")
+                self._close_connections()
             logging.info("Database connections closed")
         except Exception as e:
             logging.error(f"Error closing database connections: {str(e)}")
             raise
 
-    def get_bet_history(self) -> pd.DataFrame:
-        """Get completed bets with results and account details."""
+    _SQL_BET_HISTORY = """
+        SELECT
+            b.bet_id,
+            m.team1,
+            m.team2,
+            m.match_date,
+            m.match_time,
+            b.team1_odds,
+            b.team2_odds,
+            b.betting_value,
+            b.created_at,
+            r.result_type,
+            r.winning_team,
+            r.profit_amount,
+            r.loss_amount,
+            r.cashout_details
+        FROM bets b
+        JOIN matches m ON b.match_id = m.match_id
+        LEFT JOIN results r ON b.bet_id = r.bet_id
+        WHERE b.status = 'completed'
+          AND (? IS NULL
+               OR m.match_date < ?
+               OR (m.match_date = ? AND b.bet_id < ?))
+        ORDER BY m.match_date DESC, b.bet_id DESC
+        LIMIT ?
+    """
+    # Flat variant: one row per (bet, account), joined in SQL so no per-bet
+    # Python fan-out is needed. The LIMIT stays per bet via the subquery.
+    _SQL_BET_HISTORY_FLAT = """
+        SELECT
+            h.*,
+            ba.team_number,
+            ba.bet_amount,
+            ba.account_id
+        FROM (""" + _SQL_BET_HISTORY + """) h
+        JOIN bet_accounts ba ON ba.bet_id = h.bet_id
+        ORDER BY h.match_date DESC, h.bet_id DESC,
+                 ba.team_number, ba.account_id
+    """
+
+    @staticmethod
+    def _history_params(before: Optional[Tuple[str, int]],
+                        limit: int) -> tuple:
+        """Expand the (match_date, bet_id) page cursor into query params.
+
+        The composite cursor keeps pagination exact when several bets
+        share the boundary date, which is the norm with two fixed match
+        times per day.
+        """
+        before_date, before_bet = before if before else (None, None)
+        return (before_date, before_date, before_date, before_bet, limit)
+
+    def get_bet_history(self, limit: int = 100,
+                        before: Optional[Tuple[str, int]] = None,
+                        include_accounts: bool = True) -> pd.DataFrame:
+        """Get completed bets with results and account details.
+
+        Returns at most `limit` bets; pass the previous page's last
+        (match_date, bet_id) as `before` to fetch the next one. With
+        include_accounts=False the frame stays scalar-only (no nested
+        accounts column), which keeps it Arrow-serializable for callers
+        that cache it.
+        """
         try:
-            conn, cursor = self._get_connection()
-            # Get all completed bets with results
-            bets = pd.read_sql_query("""
-                SELECT 
-                    b.bet_id,
-                    m.team1,
-                    m.team2,
-                    m.match_date,
-                    m.match_time,
-                    b.team1_odds,
-                    b.team2_odds,
-                    b.betting_value,
-                    b.created_at,
-                    r.result_type,
-                    r.winning_team,
-                    r.profit_amount,
-                    r.loss_amount,
-                    r.cashout_details
-                FROM bets b
-                JOIN matches m ON b.match_id = m.match_id
-                LEFT JOIN results r ON b.bet_id = r.bet_id
-                WHERE b.status = 'completed'
-                ORDER BY m.match_date DESC, m.match_time DESC
-            """, conn)
-            # Attach account details for each bet
-            all_accounts = []
-            for bet_id in bets['bet_id']:
-                cursor.execute("""
-                    SELECT 
-                        ba.team_number,
-                        ba.bet_amount,
-                        a.account_id,
-                        a.name,
-                        a.balance
-                    FROM bet_accounts ba
-                    JOIN accounts a ON ba.account_id = a.account_id
-                    WHERE ba.bet_id = ?
-                    ORDER BY ba.team_number, a.account_id
-                """, (bet_id,))
-                accounts = [dict(row) for row in cursor.fetchall()]
-                all_accounts.append(accounts)
-            bets['accounts'] = all_accounts
-            return bets
+            with self._read() as conn:
+                bets = self._read_frame(conn, self._SQL_BET_HISTORY,
+                                        self._history_params(before, limit))
+                if not include_accounts:
+                    return bets
+                return self._attach_accounts(conn, bets)
         except Exception as e:
             logging.error(f"Error getting bet history: {str(e)}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    def get_bet_history_flat(self, limit: int = 100,
+                             before: Optional[Tuple[str, int]] = None) -> pd.DataFrame:
+        """Get completed-bet history as one row per (bet, account).
+
+        The account breakdown is joined in SQL, so callers can group the
+        frame by bet_id instead of unpacking nested Python lists. `before`
+        is the previous page's last (match_date, bet_id).
+        """
+        try:
+            with self._read() as conn:
+                return self._read_frame(conn, self._SQL_BET_HISTORY_FLAT,
+                                        self._history_params(before, limit))
+        except Exception as e:
+            logging.error(f"Error getting flat bet history: {str(e)}")
+            return pd.DataFrame()
+
+    def iter_bet_history(self, chunksize: int = 1000):
+        """Yield the full completed-bet history in DataFrame chunks.
+
+        Keeps memory constant for installations with a large history;
+        each yielded chunk carries its own accounts column.
+        """
+        with self._read() as conn:
+            for chunk in pd.read_sql_query(self._SQL_BET_HISTORY, conn,
+                                           params=self._history_params(None, -1),
+                                           chunksize=chunksize):
+                yield self._attach_accounts(conn, chunk)
+
+    def _attach_accounts(self, conn: sqlite3.Connection,
+                         bets: pd.DataFrame) -> pd.DataFrame:
+        """Attach account breakdowns to a bets frame with one batched query."""
+        if bets.empty:
+            bets['accounts'] = []
+            return bets
+        bet_ids = tuple(bets['bet_id'])
+        placeholders = ','.join('?' * len(bet_ids))
+        accounts = self._read_frame(conn, f"""
+            SELECT
+                ba.bet_id,
+                ba.team_number,
+                ba.bet_amount,
+                a.account_id,
+                a.name,
+                a.balance
+            FROM bet_accounts ba
+            JOIN accounts a ON ba.account_id = a.account_id
+            WHERE ba.bet_id IN ({placeholders})
+            ORDER BY ba.bet_id, ba.team_number, a.account_id
+        """, bet_ids)
+        grouped = {
+            bet_id: group.drop(columns='bet_id').to_dict('records')
+            for bet_id, group in accounts.groupby('bet_id', sort=False)
+        }
+        bets['accounts'] = bets['bet_id'].map(lambda b: grouped.get(b, []))
+        return bets
\ No newline at end of file
@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
+from functools import lru_cache
 import math
 import os
 from database import Database
 import logging
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 # Set up logging
 logging.basicConfig(
@@ -27,6 +28,13 @@ def get_ipl_teams():
         "Lucknow Super Giants"
     ]
 IPL_TEAMS = get_ipl_teams()
+_TEAM_INDEX = {team: i for i, team in enumerate(IPL_TEAMS)}
+
+MATCH_TIMES = ("3:30 PM", "7:30 PM")
+_MATCH_TIME_INDEX = {t: i for i, t in enumerate(MATCH_TIMES)}
+
+# Bets per Bet History page; older pages load on demand via their cursor
+HISTORY_PAGE_SIZE = 100
 
 # Page Configuration
 st.set_page_config(
@@ -36,8 +44,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS (built once and cached; the string itself never changes)
+@st.cache_data
+def get_page_css() -> str:
+    return """
     <style>
     .main {
         padding: 2rem;
@@ -95,7 +105,35 @@ st.markdown("""
         color: #000000;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+st.markdown(get_page_css(), unsafe_allow_html=True)
+
+# Card templates shared by the Active Bets and Bet History loops; keeping
+# them as constants avoids rebuilding the markup per row on every rerun.
+MATCH_DETAILS_CARD = """
+    <div class="team-card">
+        <h4>Match Details</h4>
+        <p>📅 {match_date} | 🕒 {match_time}</p>
+        <p>⏰ Added: {created_at}</p>
+    </div>
+"""
+
+TEAM_BET_CARD = """
+    <div class="team-card">
+        <h4>Team {team_number}: {team}</h4>
+        <p>Odds: {odds:.2f}</p>
+        <p>Bet Amount: {amount}</p>
+    </div>
+"""
+
+ACCOUNT_BET_CARD = """
+    <div class="account-card">
+        <h4>Account {account_id}</h4>
+        <p>Team: {team}</p>
+        <p>Bet Amount: {amount}</p>
+    </div>
+"""
 
 # Initialize Database
 @st.cache_resource
@@ -104,20 +142,58 @@ def get_database():
 
 db = get_database()
 
+# Versioned loaders: each getter is cached on a session-scoped version
+# counter that write paths bump, so reloads with an unchanged version are
+# cache hits instead of SELECTs. st.cache_data hands back a fresh copy per
+# call, so in-place session-state mutations never leak into the cache.
+@st.cache_data
+def _load_accounts(ver: int) -> pd.DataFrame:
+    # SQLite hands back int64 balances when every stored value is integral;
+    # coerce to float so the in-place fractional mirrors (win profits,
+    # cashouts, stake deltas) never hit a dtype error
+    return (db.get_accounts()
+            .astype({'balance': 'float64'})
+            .set_index('account_id', drop=False))
+
+@st.cache_data
+def _load_active_bets(ver: int) -> pd.DataFrame:
+    bets = db.get_active_bets()
+    # Format the display amounts for the whole frame once instead of a
+    # format_currency call per rendered card
+    bets['bet_display1_str'] = '₹' + bets['bet_display1'].map('{:,.2f}'.format)
+    bets['bet_display2_str'] = '₹' + bets['bet_display2'].map('{:,.2f}'.format)
+    return bets
+
+@st.cache_data
+def _load_settings(ver: int) -> Dict:
+    return db.get_settings()
+
+def load_accounts() -> pd.DataFrame:
+    """Load accounts indexed by account_id for O(1) lookups."""
+    return _load_accounts(st.session_state.accounts_ver)
+
+def load_active_bets() -> pd.DataFrame:
+    """Load active bets for the current bets version."""
+    return _load_active_bets(st.session_state.bets_ver)
+
 # Initialize Session State
 def init_session_state():
     """Initialize session state variables."""
+    st.session_state.setdefault('accounts_ver', 0)
+    st.session_state.setdefault('bets_ver', 0)
+    st.session_state.setdefault('settings_ver', 0)
+
     if 'num_accounts' not in st.session_state:
         st.session_state.num_accounts = 2
-    
+
     if 'account_data' not in st.session_state:
-        st.session_state.account_data = db.get_accounts()
-    
-    if 'active_bets' not in st.session_state:
-        st.session_state.active_bets = db.get_active_bets()
-    
+        st.session_state.account_data = load_accounts()
+
+    # active_bets is initialized lazily by the Active Bets section so the
+    # cold start only pays for the queries needed to paint the sidebar
+
     if 'settings' not in st.session_state:
-        settings = db.get_settings()
+        settings = _load_settings(st.session_state.settings_ver)
         # Ensure default values are set
         if 'min_transfer' not in settings:
             settings['min_transfer'] = 250.0
@@ -140,35 +216,43 @@ def init_session_state():
 init_session_state()
 
 # Helper Functions
+_FMT = '₹{:,.2f}'.format
+
 def format_currency(amount: float) -> str:
     """Format amount as currency."""
-    return f"₹{amount:,.2f}"
+    return _FMT(amount)
 
+@lru_cache(maxsize=1024)
 def calculate_bet_amount(betting_value: float, odds: float, show_accurate: bool) -> float:
-    """Calculate bet amount based on betting value and odds."""
+    """Calculate bet amount based on betting value and odds.
+
+    Memoized: reruns with unchanged form inputs hit the cache instead of
+    recomputing the division and ceil.
+    """
     amount = betting_value / odds
     return amount if show_accurate else math.ceil(amount)
 
-def update_account_balance(account_id: int, amount: float, operation: str = 'add') -> None:
-    """Update account balance."""
-    try:
-        account_data = st.session_state.account_data
-        account_row = account_data[account_data['account_id'] == account_id]
-        if account_row.empty:
-            logging.error(f"Account {account_id} not found.")
-            raise ValueError(f"Account {account_id} not found.")
-        idx = account_row.index[0]
-        if operation == 'add':
-            account_data.loc[idx, 'balance'] += amount
-        else:
-            if account_data.loc[idx, 'balance'] < amount:
-                logging.error(f"Insufficient balance in account {account_id}.")
-                raise ValueError(f"Insufficient balance in account {account_id}.")
-            account_data.loc[idx, 'balance'] -= amount
-        db.save_account(account_data.iloc[idx].to_dict())
-    except Exception as e:
-        logging.error(f"Error updating account balance: {str(e)}")
-        raise
+@st.cache_data(ttl=60)
+def get_bet_details_cached(bet_id: int) -> Dict:
+    """Fetch bet details once per bet across reruns.
+
+    A bet is immutable until a result is applied, so the result handlers
+    clear this cache after writing.
+    """
+    return db.get_bet_details(bet_id)
+
+@st.cache_data(ttl=60)
+def get_bet_history_cached(before: Optional[Tuple[str, int]] = None) -> pd.DataFrame:
+    """Fetch one history page as one flat row per (bet, account).
+
+    The scalar-only frame stays Arrow-serializable in the cache, and the
+    account breakdown is already joined in SQL, so rendering just groups
+    by bet_id. `before` is the pagination cursor: the preceding page's
+    last (match_date, bet_id)."""
+    flat = db.get_bet_history_flat(limit=HISTORY_PAGE_SIZE, before=before)
+    if not flat.empty:
+        flat['bet_amount_str'] = '₹' + flat['bet_amount'].map('{:,.2f}'.format)
+    return flat
 
 # Sidebar
 with st.sidebar:
@@ -229,7 +313,8 @@ with st.sidebar:
                     'min_transfer': min_transfer,
                     'default_betting_value': default_betting_value
                 })
-                st.session_state.settings = db.get_settings()
+                st.session_state.settings_ver += 1
+                st.session_state.settings = _load_settings(st.session_state.settings_ver)
                 st.success("Settings updated successfully!")
             except Exception as e:
                 st.error(f"Error saving settings: {str(e)}")
@@ -252,12 +337,20 @@ with st.sidebar:
             if st.button("🔄 Reset Data", disabled=not reset_confirmed):
                 try:
                     if db.reset_database():
+                        # The version counters restart at 0, so the
+                        # process-global caches must be dropped too or the
+                        # loaders would serve pre-reset data
+                        _load_accounts.clear()
+                        _load_active_bets.clear()
+                        _load_settings.clear()
+                        get_bet_details_cached.clear()
+                        get_bet_history_cached.clear()
                         # Clear session state
                         for key in list(st.session_state.keys()):
                             del st.session_state[key]
                         init_session_state()
                         st.success("All data has been reset successfully!")
-                        st.experimental_rerun()
+                        st.rerun()
                 except Exception as e:
                     st.error(f"Error resetting data: {str(e)}")
     
@@ -265,18 +358,20 @@ with st.sidebar:
     
     # Account Balances
     st.markdown("### 💰 Account Balances")
-    for i in range(1, num_accounts + 1):
+
+    @st.fragment
+    def account_editor(i: int) -> None:
+        """Editor for one account; interactions rerun only this fragment."""
         with st.expander(f"Account {i}", expanded=False):
             account_data = st.session_state.account_data
-            account = account_data[account_data['account_id'] == i]
-            
-            if not account.empty:
-                current_balance = account.iloc[0]['balance']
-                current_remarks = account.iloc[0]['remarks']
+
+            if i in account_data.index:
+                current_balance = account_data.at[i, 'balance']
+                current_remarks = account_data.at[i, 'remarks']
             else:
                 current_balance = 0.0
                 current_remarks = ''
-            
+
             balance = st.number_input(
                 "Balance",
                 min_value=0.0,
@@ -285,13 +380,13 @@ with st.sidebar:
                 format="%.2f",
                 key=f"sidebar_balance_{i}"  # Unique key
             )
-            
+
             remarks = st.text_area(
                 "Remarks",
                 value=current_remarks,
                 key=f"sidebar_remarks_{i}"  # Unique key
             )
-            
+
             if st.button("💾 Save", key=f"sidebar_save_account_{i}"):
                 try:
                     db.save_account({
@@ -300,11 +395,19 @@ with st.sidebar:
                         'balance': balance,
                         'remarks': remarks
                     })
-                    st.session_state.account_data = db.get_accounts()
+                    st.session_state.accounts_ver += 1
+                    if i in account_data.index:
+                        account_data.loc[i, ['balance', 'remarks']] = [balance, remarks]
+                    else:
+                        # New account: reload to pick up DB-generated columns
+                        st.session_state.account_data = load_accounts()
                     st.success(f"Account {i} updated successfully!")
                 except Exception as e:
                     st.error(f"Error saving account: {str(e)}")
 
+    for i in range(1, num_accounts + 1):
+        account_editor(i)
+
 # Main Content
 st.title("🎲 Place New Bet")
 
@@ -336,7 +439,7 @@ with st.form("betting_form"):
         team1 = st.selectbox(
             "Select Team",
             options=IPL_TEAMS,
-            index=IPL_TEAMS.index(st.session_state.form_state['selected_team1']),
+            index=_TEAM_INDEX[st.session_state.form_state['selected_team1']],
             key="form_team1"
         )
         
@@ -351,25 +454,22 @@ with st.form("betting_form"):
         )
         
         bet_amount1 = calculate_bet_amount(betting_value, odds1, show_accurate)
-        st.markdown(f"""
-            <div class="team-card">
-                <h4>Bet Amount</h4>
-                <h3>{format_currency(bet_amount1)}</h3>
-            </div>
-        """, unsafe_allow_html=True)
+        st.metric("Bet Amount", format_currency(bet_amount1))
         
         st.markdown("#### Selected Accounts")
-        team1_accounts = []
-        for i in range(1, num_accounts + 1):
-            if st.checkbox(f"Account {i}", key=f"form_team1_acc_{i}"):
-                team1_accounts.append(i)
+        team1_accounts = st.multiselect(
+            "Accounts for Team 1",
+            options=list(range(1, num_accounts + 1)),
+            format_func=lambda i: f"Account {i}",
+            key="form_team1_accs"
+        )
 
     with col2:
         st.markdown("#### Team 2")
         team2 = st.selectbox(
             "Select Team",
             options=IPL_TEAMS,
-            index=IPL_TEAMS.index(st.session_state.form_state['selected_team2']),
+            index=_TEAM_INDEX[st.session_state.form_state['selected_team2']],
             key="form_team2"
         )
         
@@ -384,19 +484,20 @@ with st.form("betting_form"):
         )
         
         bet_amount2 = calculate_bet_amount(betting_value, odds2, show_accurate)
-        st.markdown(f"""
-            <div class="team-card">
-                <h4>Bet Amount</h4>
-                <h3>{format_currency(bet_amount2)}</h3>
-            </div>
-        """, unsafe_allow_html=True)
+        st.metric("Bet Amount", format_currency(bet_amount2))
         
         st.markdown("#### Selected Accounts")
-        team2_accounts = []
-        for i in range(1, num_accounts + 1):
-            disabled = i in team1_accounts
-            if st.checkbox(f"Account {i}", key=f"form_team2_acc_{i}", disabled=disabled):
-                team2_accounts.append(i)
+        # Inside a form team1_accounts only updates on submit, so Team 1
+        # picks may still appear here until then; the old disabled=
+        # checkboxes had the same staleness. Overlaps are also rejected
+        # at submit time below.
+        team1_selected = set(team1_accounts)
+        team2_accounts = st.multiselect(
+            "Accounts for Team 2",
+            options=[i for i in range(1, num_accounts + 1) if i not in team1_selected],
+            format_func=lambda i: f"Account {i}",
+            key="form_team2_accs"
+        )
 
     # Match Details
     st.markdown("### 📅 Match Details")
@@ -412,8 +513,8 @@ with st.form("betting_form"):
     with match_col2:
         match_time = st.selectbox(
             "Match Time",
-            options=["3:30 PM", "7:30 PM"],
-            index=["3:30 PM", "7:30 PM"].index(st.session_state.form_state['match_time']),
+            options=MATCH_TIMES,
+            index=_MATCH_TIME_INDEX[st.session_state.form_state['match_time']],
             key="match_time"
         )
     
@@ -430,29 +531,24 @@ with st.form("betting_form"):
             st.error("Please select accounts for Team 2.")
         elif len(team1_accounts) != len(team2_accounts):
             st.error(f"Unequal number of accounts selected: Team 1 ({len(team1_accounts)}) vs Team 2 ({len(team2_accounts)})")
+        elif set(team1_accounts) & set(team2_accounts):
+            st.error("An account cannot be selected for both teams.")
         else:
             try:
-                # Validate balances
-                insufficient_balance = False
-                insufficient_accounts = []
-                
-                for acc in team1_accounts:
-                    account = st.session_state.account_data[st.session_state.account_data['account_id'] == acc].iloc[0]
-                    if account['balance'] < bet_amount1:
-                        insufficient_balance = True
-                        insufficient_accounts.append((acc, bet_amount1, "Team 1"))
-                
-                for acc in team2_accounts:
-                    account = st.session_state.account_data[st.session_state.account_data['account_id'] == acc].iloc[0]
-                    if account['balance'] < bet_amount2:
-                        insufficient_balance = True
-                        insufficient_accounts.append((acc, bet_amount2, "Team 2"))
-                
-                if insufficient_balance:
+                # Validate balances with one vectorized comparison
+                account_data = st.session_state.account_data
+                required = pd.Series({
+                    **{acc: bet_amount1 for acc in team1_accounts},
+                    **{acc: bet_amount2 for acc in team2_accounts}
+                })
+                short = required[required > account_data['balance'].reindex(required.index)]
+
+                if not short.empty:
                     st.error("Insufficient balance in some accounts:")
-                    for acc, required, team in insufficient_accounts:
-                        current = st.session_state.account_data[st.session_state.account_data['account_id'] == acc].iloc[0]['balance']
-                        st.error(f"Account {acc} ({team}): Current: {format_currency(current)}, Required: {format_currency(required)}")
+                    for acc, needed in short.items():
+                        team = "Team 1" if acc in team1_accounts else "Team 2"
+                        current = account_data.at[acc, 'balance']
+                        st.error(f"Account {acc} ({team}): Current: {format_currency(current)}, Required: {format_currency(needed)}")
                 else:
                     # Create bet
                     bet_data = {
@@ -471,18 +567,21 @@ with st.form("betting_form"):
                     
                     # Save bet
                     bet_id = db.create_bet(bet_data)
-                    
-                    # Update account balances
-                    for acc in team1_accounts:
-                        update_account_balance(acc, bet_amount1, 'subtract')
-                    
-                    for acc in team2_accounts:
-                        update_account_balance(acc, bet_amount2, 'subtract')
-                    
-                    # Update session state
-                    st.session_state.active_bets = db.get_active_bets()
-                    st.session_state.account_data = db.get_accounts()
-                    
+
+                    # Deduct all stakes in one transaction
+                    deltas = {acc: -bet_amount1 for acc in team1_accounts}
+                    deltas.update({acc: -bet_amount2 for acc in team2_accounts})
+                    # DB first, mirror after: if the write fails the local
+                    # frame keeps showing the untouched balances
+                    db.apply_balance_deltas(deltas)
+                    account_data.loc[list(deltas), 'balance'] += pd.Series(deltas)
+                    st.session_state.accounts_ver += 1
+                    st.session_state.bets_ver += 1
+
+                    # Update session state (balances already adjusted above;
+                    # only the new bet row needs DB-generated fields)
+                    st.session_state.active_bets = load_active_bets()
+
                     st.success("Bet placed successfully!")
                     
                     # Show deduction summary
@@ -503,185 +602,202 @@ with st.form("betting_form"):
                         'match_time': '3:30 PM',
                         'show_accurate': False
                     }
-                    
-                    st.experimental_rerun()
+                    # No forced rerun: session state is already updated and
+                    # the Active Bets section below renders the new bet in
+                    # this same script run
             except Exception as e:
                 st.error(f"Error placing bet: {str(e)}")
 
-# Active Bets
-st.markdown("### 📊 Active Bets")
-if not st.session_state.active_bets.empty:
-    for _, bet in st.session_state.active_bets.iterrows():
-        with st.expander(f"Bet {bet['bet_id']} - {bet['team1']} vs {bet['team2']}", expanded=False):
-            st.markdown(f"""
-                <div class="team-card">
-                    <h4>Match Details</h4>
-                    <p>📅 {bet['match_date']} | 🕒 {bet['match_time']}</p>
-                    <p>⏰ Added: {bet['created_at']}</p>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            bet_col1, bet_col2 = st.columns(2)
-            
-            with bet_col1:
-                st.markdown(f"""
-                    <div class="team-card">
-                        <h4>Team 1: {bet['team1']}</h4>
-                        <p>Odds: {bet['team1_odds']:.2f}</p>
-                        <p>Bet Amount: {format_currency(bet['betting_value'] / bet['team1_odds'])}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            with bet_col2:
-                st.markdown(f"""
-                    <div class="team-card">
-                        <h4>Team 2: {bet['team2']}</h4>
-                        <p>Odds: {bet['team2_odds']:.2f}</p>
-                        <p>Bet Amount: {format_currency(bet['betting_value'] / bet['team2_odds'])}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            # Result Menu
-            st.markdown("### Result")
-            result_type = st.selectbox(
-                "Select Result Type",
-                ["Select Result", "Win", "Loss", "Cashout"],
-                key=f"result_type_{bet['bet_id']}"
+@st.fragment
+def render_active_bet(bet: Dict) -> None:
+    """Render one active bet; result widgets rerun only this fragment."""
+    with st.expander(f"Bet {bet['bet_id']} - {bet['team1']} vs {bet['team2']}", expanded=False):
+        st.markdown(MATCH_DETAILS_CARD.format(
+            match_date=bet['match_date'],
+            match_time=bet['match_time'],
+            created_at=bet['created_at']
+        ), unsafe_allow_html=True)
+
+        bet_col1, bet_col2 = st.columns(2)
+
+        with bet_col1:
+            st.markdown(TEAM_BET_CARD.format(
+                team_number=1,
+                team=bet['team1'],
+                odds=bet['team1_odds'],
+                amount=bet['bet_display1_str']
+            ), unsafe_allow_html=True)
+
+        with bet_col2:
+            st.markdown(TEAM_BET_CARD.format(
+                team_number=2,
+                team=bet['team2'],
+                odds=bet['team2_odds'],
+                amount=bet['bet_display2_str']
+            ), unsafe_allow_html=True)
+        
+        # Result Menu
+        st.markdown("### Result")
+        result_type = st.selectbox(
+            "Select Result Type",
+            ["Select Result", "Win", "Loss", "Cashout"],
+            key=f"result_type_{bet['bet_id']}"
+        )
+        
+        if result_type == "Win":
+            winning_team = st.selectbox(
+                "Select Winning Team",
+                [bet['team1'], bet['team2']],
+                key=f"winning_team_{bet['bet_id']}"
             )
             
-            if result_type == "Win":
-                winning_team = st.selectbox(
-                    "Select Winning Team",
-                    [bet['team1'], bet['team2']],
-                    key=f"winning_team_{bet['bet_id']}"
-                )
-                
-                if st.button("Apply Win", key=f"apply_win_{bet['bet_id']}"):
-                    try:
-                        # Get bet details
-                        bet_details = db.get_bet_details(bet['bet_id'])
-                        
-                        # Calculate profits
-                        winning_accounts = []
-                        if winning_team == bet['team1']:
-                            for acc in bet_details['accounts']:
-                                if acc['team_number'] == 1:
-                                    profit = acc['bet_amount'] * bet['team1_odds']
-                                    update_account_balance(acc['account_id'], profit)
-                                    winning_accounts.append({
-                                        'account_id': acc['account_id'],
-                                        'profit': profit
-                                    })
-                        else:
-                            for acc in bet_details['accounts']:
-                                if acc['team_number'] == 2:
-                                    profit = acc['bet_amount'] * bet['team2_odds']
-                                    update_account_balance(acc['account_id'], profit)
-                                    winning_accounts.append({
-                                        'account_id': acc['account_id'],
-                                        'profit': profit
-                                    })
-                        
-                        # Save result
-                        db.save_result({
-                            'bet_id': bet['bet_id'],
-                            'winning_team': 1 if winning_team == bet['team1'] else 2,
-                            'result_type': 'win',
-                            'winning_accounts': winning_accounts
-                        })
-                        
-                        # Update session state
-                        st.session_state.active_bets = db.get_active_bets()
-                        st.session_state.account_data = db.get_accounts()
-                        
-                        st.success("Win applied successfully!")
-                        st.experimental_rerun()
-                    except Exception as e:
-                        st.error(f"Error applying win: {str(e)}")
+            if st.button("Apply Win", key=f"apply_win_{bet['bet_id']}"):
+                try:
+                    # Get bet details
+                    bet_details = get_bet_details_cached(bet['bet_id'])
+                    
+                    # Calculate profits; save_result credits the accounts,
+                    # so no per-account writes happen here
+                    team_number = 1 if winning_team == bet['team1'] else 2
+                    odds = bet['team1_odds'] if team_number == 1 else bet['team2_odds']
+                    winning_accounts = [
+                        {'account_id': acc['account_id'],
+                         'profit': acc['bet_amount'] * odds}
+                        for acc in bet_details['accounts']
+                        if acc['team_number'] == team_number
+                    ]
+
+                    # One transaction: complete the bet, insert the result
+                    # row, and credit every winner
+                    db.save_result({
+                        'bet_id': bet['bet_id'],
+                        'winning_team': team_number,
+                        'result_type': 'win',
+                        'winning_accounts': winning_accounts
+                    })
+
+                    # Mirror the credits locally and drop the closed bet
+                    for winner in winning_accounts:
+                        st.session_state.account_data.at[winner['account_id'], 'balance'] += winner['profit']
+                    st.session_state.accounts_ver += 1
+                    get_bet_details_cached.clear()
+                    get_bet_history_cached.clear()
+                    st.session_state.bets_ver += 1
+                    st.session_state.active_bets = st.session_state.active_bets[
+                        st.session_state.active_bets['bet_id'] != bet['bet_id']
+                    ]
+
+                    st.success("Win applied successfully!")
+                    # Full-app rerun: this runs inside a fragment, so
+                    # without it the closed bet (and its live button)
+                    # and the stale sidebar would keep rendering
+                    st.rerun(scope="app")
+                except Exception as e:
+                    st.error(f"Error applying win: {str(e)}")
+        
+        elif result_type == "Loss":
+            if st.button("Apply Loss", key=f"apply_loss_{bet['bet_id']}"):
+                try:
+                    # Save result
+                    db.save_result({
+                        'bet_id': bet['bet_id'],
+                        'winning_team': 0,
+                        'result_type': 'loss'
+                    })
+                    
+                    # Update session state: drop the closed bet locally
+                    get_bet_details_cached.clear()
+                    get_bet_history_cached.clear()
+                    st.session_state.bets_ver += 1
+                    st.session_state.active_bets = st.session_state.active_bets[
+                        st.session_state.active_bets['bet_id'] != bet['bet_id']
+                    ]
+
+                    st.success("Loss applied successfully!")
+                    st.rerun(scope="app")
+                except Exception as e:
+                    st.error(f"Error applying loss: {str(e)}")
+        
+        elif result_type == "Cashout":
+            st.markdown("### Cashout Details")
             
-            elif result_type == "Loss":
-                if st.button("Apply Loss", key=f"apply_loss_{bet['bet_id']}"):
-                    try:
-                        # Save result
-                        db.save_result({
-                            'bet_id': bet['bet_id'],
-                            'winning_team': 0,
-                            'result_type': 'loss'
-                        })
-                        
-                        # Update session state
-                        st.session_state.active_bets = db.get_active_bets()
-                        
-                        st.success("Loss applied successfully!")
-                        st.experimental_rerun()
-                    except Exception as e:
-                        st.error(f"Error applying loss: {str(e)}")
+            # Get bet details
+            bet_details = get_bet_details_cached(bet['bet_id'])
             
-            elif result_type == "Cashout":
-                st.markdown("### Cashout Details")
-                
-                # Get bet details
-                bet_details = db.get_bet_details(bet['bet_id'])
-                
-                cashout_details = []
-                for acc in bet_details['accounts']:
-                    with st.expander(f"Account {acc['account_id']}", expanded=False):
-                        is_cashed_out = st.checkbox("Cashed Out", key=f"cashout_{bet['bet_id']}_{acc['account_id']}")
-                        if is_cashed_out:
-                            cashout_amount = st.number_input(
-                                "Cashout Amount",
-                                min_value=0.0,
-                                value=0.0,
-                                step=100.0,
-                                key=f"cashout_amount_{bet['bet_id']}_{acc['account_id']}"
-                            )
-                            if st.button("Apply Cashout", key=f"apply_cashout_{bet['bet_id']}_{acc['account_id']}"):
-                                try:
-                                    update_account_balance(acc['account_id'], cashout_amount)
-                                    cashout_details.append({
-                                        'account_id': acc['account_id'],
-                                        'amount': cashout_amount
-                                    })
-                                    st.success(f"Cashout amount added to Account {acc['account_id']}")
-                                except Exception as e:
-                                    st.error(f"Error applying cashout: {str(e)}")
-                
-                if st.button("Complete Cashout", key=f"complete_cashout_{bet['bet_id']}"):
-                    try:
-                        # Save result
-                        db.save_result({
-                            'bet_id': bet['bet_id'],
-                            'winning_team': 0,
-                            'result_type': 'cashout',
-                            'cashout_details': cashout_details
+            # Collect cashouts client-side; nothing is written until
+            # Complete Cashout commits them all in one transaction
+            cashout_details = []
+            for acc in bet_details['accounts']:
+                with st.expander(f"Account {acc['account_id']}", expanded=False):
+                    is_cashed_out = st.checkbox("Cashed Out", key=f"cashout_{bet['bet_id']}_{acc['account_id']}")
+                    if is_cashed_out:
+                        cashout_amount = st.number_input(
+                            "Cashout Amount",
+                            min_value=0.0,
+                            value=0.0,
+                            step=100.0,
+                            key=f"cashout_amount_{bet['bet_id']}_{acc['account_id']}"
+                        )
+                        cashout_details.append({
+                            'account_id': acc['account_id'],
+                            'amount': cashout_amount
                         })
-                        
-                        # Update session state
-                        st.session_state.active_bets = db.get_active_bets()
-                        st.session_state.account_data = db.get_accounts()
-                        
-                        st.success("Cashout completed successfully!")
-                        st.experimental_rerun()
-                    except Exception as e:
-                        st.error(f"Error completing cashout: {str(e)}")
+            
+            if st.button("Complete Cashout", key=f"complete_cashout_{bet['bet_id']}"):
+                try:
+                    # Save result
+                    db.save_result({
+                        'bet_id': bet['bet_id'],
+                        'winning_team': 0,
+                        'result_type': 'cashout',
+                        'cashout_details': cashout_details
+                    })
+
+                    # Mirror the credits locally and drop the closed bet
+                    for entry in cashout_details:
+                        st.session_state.account_data.at[entry['account_id'], 'balance'] += entry['amount']
+                    st.session_state.accounts_ver += 1
+                    get_bet_details_cached.clear()
+                    get_bet_history_cached.clear()
+                    st.session_state.bets_ver += 1
+                    st.session_state.active_bets = st.session_state.active_bets[
+                        st.session_state.active_bets['bet_id'] != bet['bet_id']
+                    ]
+
+                    st.success("Cashout completed successfully!")
+                    st.rerun(scope="app")
+                except Exception as e:
+                    st.error(f"Error completing cashout: {str(e)}")
+
+# Active Bets
+st.markdown("### 📊 Active Bets")
+if 'active_bets' not in st.session_state:
+    st.session_state.active_bets = load_active_bets()
+if not st.session_state.active_bets.empty:
+    for bet in st.session_state.active_bets.to_dict(orient='records'):
+        render_active_bet(bet)
 else:
     st.info("No active bets. Add a bet using the form above.")
 
 # Bet History
 st.markdown("### 📜 Bet History")
 try:
-    history = db.get_bet_history()
+    # One cached page per cursor; "Load older bets" appends the next cursor
+    cursors = st.session_state.setdefault('history_cursors', [None])
+    pages = [get_bet_history_cached(cursor) for cursor in cursors]
+    history = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
     if not history.empty:
-        for _, bet in history.iterrows():
-            with st.expander(f"Bet {bet['bet_id']} - {bet['team1']} vs {bet['team2']}", expanded=False):
-                st.markdown(f"""
-                    <div class="team-card">
-                        <h4>Match Details</h4>
-                        <p>📅 {bet['match_date']} | 🕒 {bet['match_time']}</p>
-                        <p>⏰ Added: {bet['created_at']}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-                
+        # One flat row per (bet, account): render the bet header from the
+        # group's first row, then an account card per group row
+        for bet_id, group in history.groupby('bet_id', sort=False):
+            bet = group.iloc[0]
+            with st.expander(f"Bet {bet_id} - {bet['team1']} vs {bet['team2']}", expanded=False):
+                st.markdown(MATCH_DETAILS_CARD.format(
+                    match_date=bet['match_date'],
+                    match_time=bet['match_time'],
+                    created_at=bet['created_at']
+                ), unsafe_allow_html=True)
+
                 # Result details
                 st.markdown(f"""
                     <div class="team-card">
@@ -691,17 +807,28 @@ try:
                         {f"<p>Loss: {format_currency(bet['loss_amount'])}</p>" if bet.get('loss_amount') else ""}
                     </div>
                 """, unsafe_allow_html=True)
-                
+
                 # Account details
                 st.markdown("### Account Details")
-                for acc in bet['accounts']:
-                    st.markdown(f"""
-                        <div class="account-card">
-                            <h4>Account {acc['account_id']}</h4>
-                            <p>Team: {bet['team1'] if acc['team_number'] == 1 else bet['team2']}</p>
-                            <p>Bet Amount: {format_currency(acc['bet_amount'])}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
+                for acc in group.itertuples():
+                    st.markdown(ACCOUNT_BET_CARD.format(
+                        account_id=acc.account_id,
+                        team=bet['team1'] if acc.team_number == 1 else bet['team2'],
+                        amount=acc.bet_amount_str
+                    ), unsafe_allow_html=True)
+
+        # A full last page means older bets may exist beyond it
+        last_page = pages[-1]
+        if not last_page.empty and last_page['bet_id'].nunique() >= HISTORY_PAGE_SIZE:
+            if st.button("⬇️ Load older bets"):
+                # Composite cursor: bets sharing the boundary date resume
+                # from the boundary bet_id instead of being skipped
+                boundary_date = str(last_page['match_date'].min())
+                boundary_bet = int(
+                    last_page.loc[last_page['match_date'] == boundary_date, 'bet_id'].min()
+                )
+                st.session_state.history_cursors.append((boundary_date, boundary_bet))
+                st.rerun()
     else:
         st.info("No bet history available.")
 except Exception as e: